@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Comparação facial em lote, sem Telegram
+Lê um CSV com pares de imagens, codifica cada imagem única uma única vez
+usando todos os núcleos disponíveis e grava os resultados de forma incremental
+em CSV ou Parquet, com checkpoint para retomar após interrupção.
+
+Exemplo:
+    python comparar_lote.py pares.csv resultados.csv --diretorio fotos/
+    python comparar_lote.py pares.csv resultados.parquet --retomar
+
+Dependências em requirements_lote.txt (pyarrow só é necessário para Parquet).
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import logging
+import argparse
+import itertools
+import collections
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from reconhecimento_facial import detectar_rosto, extrair_caracteristicas, comparar_rostos
+
+logger = logging.getLogger(__name__)
+
+# Colunas do arquivo de resultados
+COLUNAS_SAIDA = ["imagem1", "imagem2", "similaridade", "confiabilidade", "distancia", "erro"]
+
+# Quantidade padrão de pares lidos do CSV de entrada a cada lote
+TAMANHO_LOTE = 1000
+
+# Lotes com imagens já enviadas aos processos enquanto o lote mais antigo é
+# comparado e gravado, para que os núcleos não fiquem ociosos entre lotes
+LOTES_EM_ANDAMENTO = 2
+
+def codificar_imagem(caminho):
+    """Detecta o rosto e extrai o encoding de uma imagem (executado nos processos do pool)."""
+    try:
+        sucesso, resultado = detectar_rosto(caminho)
+        if not sucesso:
+            return caminho, None, resultado
+
+        encoding = extrair_caracteristicas(caminho, resultado)
+        if encoding is None:
+            return caminho, None, "Não foi possível extrair características faciais"
+
+        return caminho, encoding, ""
+    except Exception as e:
+        # Uma imagem problemática não deve derrubar o lote inteiro
+        return caminho, None, f"Erro ao processar imagem: {e}"
+
+def normalizar_caminho(imagem, diretorio):
+    """Monta o caminho da imagem de forma canônica, para que cada arquivo seja codificado uma vez."""
+    if diretorio:
+        imagem = os.path.join(diretorio, imagem)
+    return os.path.normpath(imagem)
+
+def ler_pares(caminho_csv, coluna1, coluna2, diretorio):
+    """Abre o CSV de entrada e confere o cabeçalho, devolvendo o gerador de pares."""
+    arquivo = open(caminho_csv, newline="", encoding="utf-8")
+    leitor = csv.DictReader(arquivo)
+    for campo in (coluna1, coluna2):
+        if leitor.fieldnames is None or campo not in leitor.fieldnames:
+            arquivo.close()
+            raise ValueError(f"Coluna '{campo}' não encontrada em {caminho_csv}")
+
+    return gerar_pares(arquivo, leitor, coluna1, coluna2, diretorio)
+
+def gerar_pares(arquivo, leitor, coluna1, coluna2, diretorio):
+    """Percorre o CSV de entrada sem carregá-lo inteiro, gerando tuplas (imagem1, imagem2, erro)."""
+    with arquivo:
+        for linha in leitor:
+            # DictReader preenche com None os campos ausentes em linhas curtas
+            imagem1 = (linha[coluna1] or "").strip()
+            imagem2 = (linha[coluna2] or "").strip()
+
+            # Linhas incompletas viram linhas de erro no resultado em vez de interromper o lote
+            if not imagem1 or not imagem2:
+                yield imagem1, imagem2, f"Linha {leitor.line_num} do CSV de entrada incompleta"
+                continue
+
+            yield normalizar_caminho(imagem1, diretorio), normalizar_caminho(imagem2, diretorio), ""
+
+def carregar_checkpoint(caminho):
+    """Carrega o checkpoint salvo, ou None se ainda não existir."""
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+def salvar_checkpoint(caminho, estado):
+    """Grava o checkpoint de forma atômica (arquivo temporário + rename)."""
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(estado, arquivo)
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+    os.replace(temporario, caminho)
+
+class SaidaCSV:
+    """Grava os resultados em um único CSV, acrescentando linhas a cada lote."""
+
+    def __init__(self, caminho, estado):
+        self.arquivo = open(caminho, "a+", newline="", encoding="utf-8")
+        # Descarta linhas gravadas depois do último checkpoint (execução interrompida)
+        self.arquivo.truncate(estado.get("bytes_saida", 0))
+        self.arquivo.seek(0, os.SEEK_END)
+        self.escritor = csv.DictWriter(self.arquivo, fieldnames=COLUNAS_SAIDA)
+        if self.arquivo.tell() == 0:
+            self.escritor.writeheader()
+            self.arquivo.flush()
+            os.fsync(self.arquivo.fileno())
+        estado["bytes_saida"] = self.arquivo.tell()
+
+    def gravar(self, linhas, estado):
+        self.escritor.writerows(linhas)
+        self.arquivo.flush()
+        os.fsync(self.arquivo.fileno())
+        estado["bytes_saida"] = self.arquivo.tell()
+
+    def fechar(self):
+        self.arquivo.close()
+
+class SaidaParquet:
+    """Grava os resultados como um diretório de arquivos Parquet, um por lote."""
+
+    def __init__(self, caminho, estado):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit("A saída em Parquet requer o pacote pyarrow (pip install pyarrow)")
+
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.diretorio = caminho
+        os.makedirs(caminho, exist_ok=True)
+        self.limpar_restos(estado.get("partes", 0))
+        self.esquema = pyarrow.schema([
+            ("imagem1", pyarrow.string()),
+            ("imagem2", pyarrow.string()),
+            ("similaridade", pyarrow.float64()),
+            ("confiabilidade", pyarrow.string()),
+            ("distancia", pyarrow.float64()),
+            ("erro", pyarrow.string()),
+        ])
+
+    def limpar_restos(self, partes):
+        """Remove temporários e partes gravados depois do último checkpoint."""
+        for nome in os.listdir(self.diretorio):
+            if nome.startswith(".parte-") and nome.endswith(".tmp"):
+                os.remove(os.path.join(self.diretorio, nome))
+            elif nome.startswith("parte-") and nome.endswith(".parquet"):
+                indice = nome[len("parte-"):-len(".parquet")]
+                if indice.isdigit() and int(indice) >= partes:
+                    os.remove(os.path.join(self.diretorio, nome))
+
+    def gravar(self, linhas, estado):
+        parte = estado.get("partes", 0)
+        nome = f"parte-{parte:05d}.parquet"
+        destino = os.path.join(self.diretorio, nome)
+        # O prefixo "." faz os leitores de datasets Parquet ignorarem o temporário
+        temporario = os.path.join(self.diretorio, f".{nome}.tmp")
+
+        tabela = self.pa.Table.from_pylist(linhas, schema=self.esquema)
+        self.pq.write_table(tabela, temporario)
+        os.replace(temporario, destino)
+        estado["partes"] = parte + 1
+
+    def fechar(self):
+        pass
+
+def imagens_do_lote(pares):
+    """Caminhos das imagens referenciadas pelas linhas válidas do lote."""
+    return {imagem for imagem1, imagem2, erro in pares if not erro for imagem in (imagem1, imagem2)}
+
+def submeter_imagens(pares, encodings, pendentes, executor):
+    """Envia aos processos as imagens do lote que ainda não foram nem estão sendo codificadas."""
+    for imagem in imagens_do_lote(pares):
+        if imagem not in encodings and imagem not in pendentes:
+            pendentes[imagem] = executor.submit(codificar_imagem, imagem)
+
+def aguardar_imagens(pares, encodings, pendentes):
+    """Aguarda a codificação das imagens do lote, movendo os resultados para o cache."""
+    for imagem in imagens_do_lote(pares):
+        if imagem in pendentes:
+            caminho, encoding, erro = pendentes.pop(imagem).result()
+            encodings[caminho] = (encoding, erro)
+
+def comparar_pares(pares, encodings):
+    """Compara os pares do lote usando os encodings já calculados."""
+    linhas = []
+    for imagem1, imagem2, erro in pares:
+        linha = {"imagem1": imagem1, "imagem2": imagem2, "similaridade": None,
+                 "confiabilidade": None, "distancia": None, "erro": erro}
+        if erro:
+            linhas.append(linha)
+            continue
+
+        encoding1, erro1 = encodings[imagem1]
+        encoding2, erro2 = encodings[imagem2]
+
+        if encoding1 is None or encoding2 is None:
+            linha["erro"] = "; ".join(
+                f"{imagem}: {erro}" for imagem, erro in ((imagem1, erro1), (imagem2, erro2)) if erro
+            )
+        else:
+            resultado = comparar_rostos(encoding1, encoding2)
+            linha["similaridade"] = float(resultado["similaridade"])
+            linha["confiabilidade"] = resultado["confiabilidade"]
+            linha["distancia"] = float(resultado["distancia"])
+
+        linhas.append(linha)
+
+    return linhas
+
+def executar(args, criar_executor=ProcessPoolExecutor):
+    """Processa o CSV de entrada lote a lote, salvando o checkpoint após cada gravação."""
+    checkpoint = args.checkpoint or args.saida.rstrip(os.sep) + ".checkpoint.json"
+    estado = carregar_checkpoint(checkpoint)
+
+    # Parâmetros que determinam o conteúdo dos resultados; uma retomada só é
+    # válida se todos forem iguais aos da execução original
+    parametros = {
+        "entrada": os.path.abspath(args.entrada),
+        "diretorio": os.path.abspath(args.diretorio) if args.diretorio else None,
+        "coluna1": args.coluna1,
+        "coluna2": args.coluna2,
+        "formato": "parquet" if args.saida.lower().endswith(".parquet") else "csv",
+    }
+
+    if estado is None:
+        if os.path.exists(args.saida):
+            raise SystemExit(f"{args.saida} já existe e não há checkpoint em {checkpoint}. Remova-o para recomeçar.")
+        estado = dict(parametros, pares_processados=0, bytes_saida=0, partes=0)
+    elif estado.get("concluido"):
+        raise SystemExit(
+            f"{args.saida} já foi concluído ({estado['pares_processados']} pares). "
+            f"Remova-o junto com {checkpoint} para recomeçar."
+        )
+    elif not args.retomar:
+        raise SystemExit(f"Checkpoint encontrado em {checkpoint}. Use --retomar para continuar.")
+    else:
+        for chave, valor in parametros.items():
+            if estado.get(chave) != valor:
+                raise SystemExit(
+                    f"O checkpoint {checkpoint} foi criado com {chave}={estado.get(chave)!r}, "
+                    f"diferente do atual ({valor!r})"
+                )
+
+    # Abre a entrada antes de criar qualquer arquivo, para que um caminho ou uma
+    # coluna errada não deixe para trás uma saída e um checkpoint órfãos
+    pares = ler_pares(args.entrada, args.coluna1, args.coluna2, args.diretorio)
+    pares = itertools.islice(pares, estado["pares_processados"], None)
+
+    # Grava o checkpoint antes de criar a saída, para que uma interrupção ainda no
+    # primeiro lote também possa ser retomada
+    salvar_checkpoint(checkpoint, estado)
+
+    if parametros["formato"] == "parquet":
+        saida = SaidaParquet(args.saida, estado)
+    else:
+        saida = SaidaCSV(args.saida, estado)
+
+    processos = args.processos or os.cpu_count() or 1
+
+    if estado["pares_processados"]:
+        logger.info(f"Retomando a partir do par {estado['pares_processados']}")
+
+    # Cache de encodings por caminho, compartilhado entre lotes para nunca codificar
+    # a mesma imagem duas vezes, e imagens enviadas aos processos ainda sem resultado
+    encodings = {}
+    pendentes = {}
+    lotes = collections.deque()
+    fim_da_entrada = False
+    inicio = time.monotonic()
+    total = 0
+
+    executor = criar_executor(processos)
+    try:
+        while True:
+            # Mantém os próximos lotes sendo codificados enquanto o mais antigo é gravado
+            while not fim_da_entrada and len(lotes) < LOTES_EM_ANDAMENTO:
+                lote = list(itertools.islice(pares, args.tamanho_lote))
+                if not lote:
+                    fim_da_entrada = True
+                    break
+                submeter_imagens(lote, encodings, pendentes, executor)
+                lotes.append(lote)
+
+            if not lotes:
+                break
+
+            lote = lotes.popleft()
+            try:
+                aguardar_imagens(lote, encodings, pendentes)
+            except BrokenProcessPool:
+                # Um processo morto (falta de memória, falha na dlib) invalida o pool
+                # inteiro; o checkpoint continua apontando para o início deste lote
+                raise SystemExit(
+                    f"Um processo de codificação foi encerrado inesperadamente no lote iniciado "
+                    f"no par {estado['pares_processados']}. Use --retomar para continuar."
+                )
+
+            saida.gravar(comparar_pares(lote, encodings), estado)
+            estado["pares_processados"] += len(lote)
+            salvar_checkpoint(checkpoint, estado)
+
+            total += len(lote)
+            decorrido = time.monotonic() - inicio
+            taxa = total / decorrido if decorrido > 0 else 0.0
+            logger.info(
+                f"{estado['pares_processados']} pares processados "
+                f"({taxa:.1f} pares/s, {len(encodings)} imagens codificadas)"
+            )
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        saida.fechar()
+
+    estado["concluido"] = True
+    salvar_checkpoint(checkpoint, estado)
+    logger.info(f"Concluído: {estado['pares_processados']} pares gravados em {args.saida}")
+
+def inteiro_positivo(valor):
+    """Tipo do argparse que aceita apenas inteiros maiores que zero."""
+    try:
+        numero = int(valor)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"valor inteiro inválido: {valor!r}")
+    if numero <= 0:
+        raise argparse.ArgumentTypeError(f"deve ser maior que zero: {valor}")
+    return numero
+
+def criar_parser():
+    """Define os argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(
+        description="Compara em lote os pares de imagens listados em um CSV."
+    )
+    parser.add_argument("entrada", help="CSV com os pares de imagens a comparar")
+    parser.add_argument("saida", help="arquivo de resultados (.csv, ou .parquet para um diretório Parquet)")
+    parser.add_argument("--diretorio", help="diretório base para os caminhos relativos das imagens")
+    parser.add_argument("--coluna1", default="imagem1", help="coluna com a primeira imagem (padrão: imagem1)")
+    parser.add_argument("--coluna2", default="imagem2", help="coluna com a segunda imagem (padrão: imagem2)")
+    parser.add_argument("--processos", type=inteiro_positivo, help="número de processos (padrão: número de núcleos)")
+    parser.add_argument("--tamanho-lote", type=inteiro_positivo, default=TAMANHO_LOTE,
+                        help=f"pares lidos por lote (padrão: {TAMANHO_LOTE})")
+    parser.add_argument("--checkpoint", help="arquivo de checkpoint (padrão: <saida>.checkpoint.json)")
+    parser.add_argument("--retomar", action="store_true", help="continua a partir do checkpoint existente")
+    return parser
+
+def main() -> None:
+    """Função principal da linha de comando."""
+    logging.basicConfig(
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
+    args = criar_parser().parse_args()
+
+    try:
+        executar(args)
+    except (OSError, ValueError) as e:
+        logger.error(f"Erro no processamento em lote: {e}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
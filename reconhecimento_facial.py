@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Funções de reconhecimento facial compartilhadas pelo bot e pela comparação em lote
+Não dependem do Telegram, podendo ser usadas em qualquer script
+"""
+
+import cv2
+import face_recognition  # Biblioteca mais leve que DeepFace
+
+def detectar_rosto(imagem_path):
+    """Detecta rostos em uma imagem usando face_recognition (mais leve que DeepFace)."""
+    # Carrega a imagem usando OpenCV
+    imagem = cv2.imread(imagem_path)
+    if imagem is None:
+        return False, "Erro ao carregar imagem"
+    
+    # Converte BGR para RGB (face_recognition usa RGB)
+    rgb_imagem = cv2.cvtColor(imagem, cv2.COLOR_BGR2RGB)
+    
+    # Detecta rostos na imagem
+    localizacoes_rostos = face_recognition.face_locations(rgb_imagem, model="hog")  # Modelo HOG é mais leve que CNN
+    
+    if len(localizacoes_rostos) == 0:
+        return False, "Nenhum rosto detectado"
+    
+    if len(localizacoes_rostos) > 1:
+        return False, f"Múltiplos rostos ({len(localizacoes_rostos)}) detectados"
+    
+    return True, localizacoes_rostos[0]
+
+def extrair_caracteristicas(imagem_path, localizacao_rosto):
+    """Extrai características faciais para comparação."""
+    # Carrega a imagem
+    imagem = cv2.imread(imagem_path)
+    rgb_imagem = cv2.cvtColor(imagem, cv2.COLOR_BGR2RGB)
+    
+    # Extrai as características faciais (encodings)
+    encodings = face_recognition.face_encodings(rgb_imagem, [localizacao_rosto])
+    
+    if len(encodings) == 0:
+        return None
+    
+    return encodings[0]
+
+def comparar_rostos(encoding1, encoding2):
+    """Compara dois encodings faciais e retorna a similaridade."""
+    # Calcula a distância facial (quanto menor, mais similar)
+    distancia = face_recognition.face_distance([encoding1], encoding2)[0]
+    
+    # Converte a distância para similaridade (0-100%)
+    similaridade = max(0, min(100, (1 - distancia) * 100))
+    
+    # Determina o nível de confiabilidade
+    if distancia < 0.4:
+        confiabilidade = "Alta"
+    elif distancia < 0.6:
+        confiabilidade = "Média"
+    else:
+        confiabilidade = "Baixa"
+    
+    return {
+        "similaridade": similaridade,
+        "confiabilidade": confiabilidade,
+        "distancia": distancia
+    }
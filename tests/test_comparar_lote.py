@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+
+"""
+Testes da comparação em lote (comparar_lote.py)
+As funções de reconhecimento são substituídas por versões determinísticas, de modo
+que os testes cobrem apenas leitura, deduplicação, checkpoint e retomada.
+"""
+
+import os
+import sys
+import csv
+import json
+import types
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import reconhecimento_facial  # noqa: F401
+except ImportError:
+    # Sem OpenCV/face_recognition o módulo real não carrega; as três funções são
+    # substituídas em todos os testes, então um módulo vazio é suficiente
+    sys.modules["reconhecimento_facial"] = types.SimpleNamespace(
+        detectar_rosto=None, extrair_caracteristicas=None, comparar_rostos=None
+    )
+
+import comparar_lote
+
+def detectar_rosto_falso(caminho):
+    if "sem_rosto" in caminho:
+        return False, "Nenhum rosto detectado"
+    return True, (0, 0, 0, 0)
+
+def extrair_caracteristicas_falso(caminho, localizacao_rosto):
+    return float(sum(map(ord, os.path.basename(caminho))))
+
+def comparar_rostos_falso(encoding1, encoding2):
+    distancia = abs(encoding1 - encoding2) / 1000
+    return {"similaridade": (1 - distancia) * 100, "confiabilidade": "Alta", "distancia": distancia}
+
+class ExecutorSequencial:
+    """Substitui o ProcessPoolExecutor, executando tudo no processo atual."""
+
+    def __init__(self, processos):
+        self.processos = processos
+
+    def submit(self, funcao, *args):
+        futuro = Future()
+        futuro.set_result(funcao(*args))
+        return futuro
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+@pytest.fixture(autouse=True)
+def reconhecimento_falso(monkeypatch):
+    monkeypatch.setattr(comparar_lote, "detectar_rosto", detectar_rosto_falso)
+    monkeypatch.setattr(comparar_lote, "extrair_caracteristicas", extrair_caracteristicas_falso)
+    monkeypatch.setattr(comparar_lote, "comparar_rostos", comparar_rostos_falso)
+
+def escrever_pares(caminho, linhas):
+    with open(caminho, "w", newline="", encoding="utf-8") as arquivo:
+        arquivo.write("imagem1,imagem2\n")
+        for linha in linhas:
+            arquivo.write(linha + "\n")
+
+def ler_resultados(caminho):
+    with open(caminho, newline="", encoding="utf-8") as arquivo:
+        return list(csv.DictReader(arquivo))
+
+def executar(*argumentos, criar_executor=ExecutorSequencial):
+    args = comparar_lote.criar_parser().parse_args(list(argumentos))
+    comparar_lote.executar(args, criar_executor=criar_executor)
+
+@pytest.fixture
+def pares(tmp_path):
+    caminho = str(tmp_path / "pares.csv")
+    linhas = [f"a{i % 7}.jpg,b{i % 5}.jpg" for i in range(23)]
+    linhas[4] = "a1.jpg,sem_rosto.jpg"
+    escrever_pares(caminho, linhas)
+    return caminho
+
+@pytest.fixture
+def referencia(tmp_path, pares):
+    """Resultado de uma execução sem interrupções."""
+    saida = str(tmp_path / "referencia.csv")
+    executar(pares, saida, "--tamanho-lote", "5")
+    with open(saida, "rb") as arquivo:
+        return arquivo.read()
+
+@pytest.mark.parametrize("lote_interrompido", [1, 3])
+def test_retomar_apos_interrupcao_gera_mesma_saida(tmp_path, monkeypatch, pares, referencia, lote_interrompido):
+    saida = str(tmp_path / "saida.csv")
+    comparar_pares = comparar_lote.comparar_pares
+    chamadas = []
+
+    def comparar_pares_interrompido(*args):
+        chamadas.append(1)
+        if len(chamadas) == lote_interrompido:
+            raise KeyboardInterrupt
+        return comparar_pares(*args)
+
+    monkeypatch.setattr(comparar_lote, "comparar_pares", comparar_pares_interrompido)
+    with pytest.raises(KeyboardInterrupt):
+        executar(pares, saida, "--tamanho-lote", "5")
+
+    monkeypatch.setattr(comparar_lote, "comparar_pares", comparar_pares)
+    executar(pares, saida, "--tamanho-lote", "5", "--retomar")
+
+    with open(saida, "rb") as arquivo:
+        assert arquivo.read() == referencia
+
+def test_retomar_descarta_linhas_gravadas_apos_checkpoint(tmp_path, monkeypatch, pares, referencia):
+    saida = str(tmp_path / "saida.csv")
+    salvar_checkpoint = comparar_lote.salvar_checkpoint
+    chamadas = []
+
+    # Interrompe depois de gravar o segundo lote, mas antes de registrá-lo no checkpoint
+    def salvar_checkpoint_interrompido(caminho, estado):
+        chamadas.append(1)
+        if len(chamadas) == 3:
+            raise KeyboardInterrupt
+        salvar_checkpoint(caminho, estado)
+
+    monkeypatch.setattr(comparar_lote, "salvar_checkpoint", salvar_checkpoint_interrompido)
+    with pytest.raises(KeyboardInterrupt):
+        executar(pares, saida, "--tamanho-lote", "5")
+
+    with open(saida + ".checkpoint.json", encoding="utf-8") as arquivo:
+        estado = json.load(arquivo)
+    assert estado["pares_processados"] == 5
+    assert os.path.getsize(saida) > estado["bytes_saida"]
+
+    monkeypatch.setattr(comparar_lote, "salvar_checkpoint", salvar_checkpoint)
+    executar(pares, saida, "--tamanho-lote", "5", "--retomar")
+
+    with open(saida, "rb") as arquivo:
+        assert arquivo.read() == referencia
+
+def test_linhas_incompletas_viram_linhas_de_erro(tmp_path):
+    entrada = str(tmp_path / "pares.csv")
+    saida = str(tmp_path / "saida.csv")
+    escrever_pares(entrada, ["a.jpg,b.jpg", "short", "c.jpg,", "a.jpg,sem_rosto.jpg"])
+
+    executar(entrada, saida)
+
+    resultados = ler_resultados(saida)
+    assert len(resultados) == 4
+    assert resultados[0]["erro"] == "" and resultados[0]["confiabilidade"] == "Alta"
+    assert "Linha 3" in resultados[1]["erro"]
+    assert "Linha 4" in resultados[2]["erro"]
+    assert "Nenhum rosto detectado" in resultados[3]["erro"]
+
+def test_cada_imagem_e_codificada_uma_vez(tmp_path, monkeypatch):
+    entrada = str(tmp_path / "pares.csv")
+    escrever_pares(entrada, ["fotos/a.jpg,fotos/b.jpg", "fotos//a.jpg,./fotos/b.jpg", "./fotos/a.jpg,fotos/c.jpg"])
+    codificadas = []
+
+    def detectar_rosto_contado(caminho):
+        codificadas.append(caminho)
+        return detectar_rosto_falso(caminho)
+
+    monkeypatch.setattr(comparar_lote, "detectar_rosto", detectar_rosto_contado)
+    executar(entrada, str(tmp_path / "saida.csv"), "--diretorio", str(tmp_path), "--tamanho-lote", "1")
+
+    assert sorted(os.path.basename(caminho) for caminho in codificadas) == ["a.jpg", "b.jpg", "c.jpg"]
+
+def test_retomar_com_outro_diretorio_e_recusado(tmp_path, monkeypatch, pares):
+    saida = str(tmp_path / "saida.csv")
+
+    def comparar_pares_interrompido(*args):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(comparar_lote, "comparar_pares", comparar_pares_interrompido)
+    with pytest.raises(KeyboardInterrupt):
+        executar(pares, saida, "--diretorio", str(tmp_path / "fotos"))
+
+    with pytest.raises(SystemExit, match="diretorio"):
+        executar(pares, saida, "--diretorio", str(tmp_path / "outras"), "--retomar")
+
+@pytest.mark.parametrize("argumento", ["--tamanho-lote", "--processos"])
+@pytest.mark.parametrize("valor", ["0", "-3"])
+def test_valores_nao_positivos_sao_rejeitados(pares, argumento, valor):
+    with pytest.raises(SystemExit):
+        comparar_lote.criar_parser().parse_args([pares, "saida.csv", argumento, valor])
+
+@pytest.mark.parametrize("argumentos", [
+    ["nao_existe.csv"],
+    ["{pares}", "--coluna1", "imagem_1"],
+])
+def test_entrada_invalida_nao_cria_arquivos(tmp_path, pares, argumentos):
+    saida = str(tmp_path / "saida.csv")
+    entrada, *opcoes = [argumento.format(pares=pares) for argumento in argumentos]
+
+    with pytest.raises((OSError, ValueError)):
+        executar(entrada, saida, *opcoes)
+
+    assert not os.path.exists(saida)
+    assert not os.path.exists(saida + ".checkpoint.json")
+
+def test_execucao_concluida_nao_e_repetida(tmp_path, pares):
+    saida = str(tmp_path / "saida.csv")
+    executar(pares, saida)
+
+    with open(saida + ".checkpoint.json", encoding="utf-8") as arquivo:
+        assert json.load(arquivo)["concluido"] is True
+    for opcoes in ([], ["--retomar"]):
+        with pytest.raises(SystemExit, match="já foi concluído"):
+            executar(pares, saida, *opcoes)
+
+def test_processo_encerrado_interrompe_e_permite_retomar(tmp_path, pares, referencia):
+    saida = str(tmp_path / "saida.csv")
+
+    class ExecutorQuebrado(ExecutorSequencial):
+        """Simula a morte de um processo ao codificar a imagem do par com sem_rosto.jpg."""
+
+        def submit(self, funcao, *args):
+            if "sem_rosto" not in args[0]:
+                return super().submit(funcao, *args)
+            futuro = Future()
+            futuro.set_exception(BrokenProcessPool("processo encerrado"))
+            return futuro
+
+    with pytest.raises(SystemExit, match="--retomar"):
+        executar(pares, saida, "--tamanho-lote", "5", criar_executor=ExecutorQuebrado)
+
+    with open(saida + ".checkpoint.json", encoding="utf-8") as arquivo:
+        assert json.load(arquivo)["pares_processados"] == 0
+
+    executar(pares, saida, "--tamanho-lote", "5", "--retomar")
+    with open(saida, "rb") as arquivo:
+        assert arquivo.read() == referencia
+
+def test_saida_parquet_retomada_e_limpeza(tmp_path, monkeypatch, pares):
+    pq = pytest.importorskip("pyarrow.parquet")
+    saida = str(tmp_path / "saida.parquet")
+    salvar_checkpoint = comparar_lote.salvar_checkpoint
+    chamadas = []
+
+    # Interrompe depois de gravar a segunda parte, mas antes de registrá-la no checkpoint
+    def salvar_checkpoint_interrompido(caminho, estado):
+        chamadas.append(1)
+        if len(chamadas) == 3:
+            raise KeyboardInterrupt
+        salvar_checkpoint(caminho, estado)
+
+    monkeypatch.setattr(comparar_lote, "salvar_checkpoint", salvar_checkpoint_interrompido)
+    with pytest.raises(KeyboardInterrupt):
+        executar(pares, saida, "--tamanho-lote", "5")
+    monkeypatch.setattr(comparar_lote, "salvar_checkpoint", salvar_checkpoint)
+
+    # Restos de uma execução interrompida: parte além do checkpoint e temporário
+    assert os.path.exists(os.path.join(saida, "parte-00001.parquet"))
+    with open(os.path.join(saida, "parte-00009.parquet"), "wb") as arquivo:
+        arquivo.write(b"lixo")
+    with open(os.path.join(saida, ".parte-00002.parquet.tmp"), "wb") as arquivo:
+        arquivo.write(b"lixo")
+
+    executar(pares, saida, "--tamanho-lote", "5", "--retomar")
+
+    assert sorted(os.listdir(saida)) == [f"parte-{indice:05d}.parquet" for indice in range(5)]
+    referencia = str(tmp_path / "referencia.csv")
+    executar(pares, referencia, "--tamanho-lote", "5")
+    esperado = ler_resultados(referencia)
+    obtido = pq.read_table(saida).to_pylist()
+    assert [(linha["imagem1"], linha["imagem2"], linha["erro"]) for linha in obtido] == \
+        [(linha["imagem1"], linha["imagem2"], linha["erro"]) for linha in esperado]
+    assert [linha["distancia"] for linha in obtido] == \
+        [float(linha["distancia"]) if linha["distancia"] else None for linha in esperado]